@@ -1,110 +1,419 @@
 from flask import Flask, request, jsonify
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
-import openai
+import functools
+import orjson
 import os
-import joblib
-import psycopg2
-from datetime import datetime, timedelta
+import numpy as np
+import queue
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pydantic import BaseModel, ValidationError
+
+# onnxruntime, openai and psycopg2 are imported where they are first used, and
+# the model is loaded on first prediction, to keep container cold starts fast.
+
+class ORJSONProvider(JSONProvider):
+    """Encode and decode JSON with orjson, which is much faster than the stdlib json module."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 CORS(app)
 
-# Initialize OpenAI API key using environment variable.
-openai.api_key = os.getenv("OPENAI_API_KEY")
+# OpenAI API key from environment variable.
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 DATABASE_URL = os.getenv("DATABASE_URL")
-# Load the machine learning model for strategy predictions.
-model = joblib.load("ml_strategy_model.pkl")
+
+@functools.lru_cache(maxsize=1)
+def get_model():
+    """
+    Load the machine learning model for strategy predictions. model_trainer.py
+    exports it to ONNX so inference runs in onnxruntime's C++ tree ensemble.
+    Batches are small, so a single intra-op thread avoids thread-pool overhead.
+    """
+    import onnxruntime as ort
+
+    session_options = ort.SessionOptions()
+    session_options.intra_op_num_threads = 1
+    session_options.inter_op_num_threads = 1
+    return ort.InferenceSession("ml_strategy_model.onnx", session_options, providers=["CPUExecutionProvider"])
+
+# Concurrent predictions are queued and run through the model together, so the
+# per-call overhead of a model run is paid once per batch instead of once per
+# request.
+PREDICT_BATCH_SIZE = 64
+PREDICT_TIMEOUT_SECONDS = 1.0
+
+_predict_queue = queue.Queue()
+_predict_worker = None
+_predict_worker_lock = threading.Lock()
+
+def _run_prediction_batches():
+    while True:
+        # Block for the first item, then take whatever else is already waiting.
+        batch = [_predict_queue.get()]
+        while len(batch) < PREDICT_BATCH_SIZE:
+            try:
+                batch.append(_predict_queue.get_nowait())
+            except queue.Empty:
+                break
+        futures = [fut for _, fut in batch]
+        try:
+            labels, probas = get_model().run(None, {"input": np.vstack([x for x, _ in batch])})
+        except Exception as exc:
+            for fut in futures:
+                fut.set_exception(exc)
+            continue
+        for fut, label, proba in zip(futures, labels, probas):
+            fut.set_result((label, float(proba.max())))
+
+def predict(x):
+    """
+    Return the predicted label and its probability for one feature row,
+    batched together with any other predictions requested at the same time.
+    """
+    global _predict_worker
+    # Make sure the model is loaded before the prediction timeout starts.
+    get_model()
+    # Started lazily so each (possibly forked) worker process gets its own thread.
+    if _predict_worker is None or not _predict_worker.is_alive():
+        with _predict_worker_lock:
+            if _predict_worker is None or not _predict_worker.is_alive():
+                _predict_worker = threading.Thread(target=_run_prediction_batches, name="predict-batcher", daemon=True)
+                _predict_worker.start()
+    fut = Future()
+    _predict_queue.put((x, fut))
+    return fut.result(timeout=PREDICT_TIMEOUT_SECONDS)
 
 # Monthly usage limit in USD for each user. Defaults to 10 USD if not provided.
 MONTHLY_LIMIT_USD = float(os.getenv("AI_MONTHLY_LIMIT_USD", "10.0"))
 
+# Length of a usage period before token count and cost are reset.
+USAGE_PERIOD_SECONDS = 30 * 24 * 60 * 60
+
+# Request rates for strategy suggestions, enforced with token buckets that
+# allow bursts of up to a full minute's worth of requests. user_id is supplied
+# by the client, so a global bucket also caps the total rate regardless of how
+# many ids are used. Both limits are per worker process: with N gunicorn
+# workers the effective limits are N times these values.
+RATE_LIMIT_PER_MINUTE = float(os.getenv("AI_RATE_LIMIT_PER_MINUTE", "10"))
+GLOBAL_RATE_LIMIT_PER_MINUTE = float(os.getenv("AI_GLOBAL_RATE_LIMIT_PER_MINUTE", "120"))
+# Upper bound on tracked users; the least recently seen are dropped first.
+RATE_LIMIT_MAX_USERS = 10_000
+
+# Buckets ordered by last use. A bucket idle for a full refill period is full
+# again, which is the same as having no bucket, so it can be dropped.
+_rate_buckets = OrderedDict()
+_global_bucket = [GLOBAL_RATE_LIMIT_PER_MINUTE, time.monotonic()]
+_rate_lock = threading.Lock()
+
+def _take_token(bucket, capacity, now):
+    tokens = min(capacity, bucket[0] + (now - bucket[1]) * capacity / 60.0)
+    bucket[1] = now
+    if tokens < 1:
+        bucket[0] = tokens
+        return False
+    bucket[0] = tokens - 1
+    return True
+
+def allow_request(user_id):
+    """
+    Take one token from the user's bucket and one from the global bucket.
+    Returns False when either is empty and the request should be rejected.
+    """
+    now = time.monotonic()
+    with _rate_lock:
+        while _rate_buckets:
+            oldest = next(iter(_rate_buckets.values()))
+            if now - oldest[1] < 60.0 and len(_rate_buckets) < RATE_LIMIT_MAX_USERS:
+                break
+            _rate_buckets.popitem(last=False)
+
+        bucket = _rate_buckets.pop(user_id, None) or [RATE_LIMIT_PER_MINUTE, now]
+        _rate_buckets[user_id] = bucket
+        if not _take_token(bucket, RATE_LIMIT_PER_MINUTE, now):
+            return False
+        if not _take_token(_global_bucket, GLOBAL_RATE_LIMIT_PER_MINUTE, now):
+            # Give the user's token back; the request was not served.
+            bucket[0] += 1
+            return False
+        return True
+
 # Default OpenAI model to use for strategy generation. This can be overridden via env var.
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-5-nano")
 
-# Pricing (USD per token) for different models. Prices are per million tokens.
+# Upper bound in seconds for a single OpenAI call.
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "30"))
+
+# Cap on completion tokens per call. Together with the prompt length this bounds
+# what a call can cost, which is reserved from the user's budget up front. For
+# reasoning models such as gpt-5-nano the hidden reasoning tokens count against
+# this cap too, so it must leave room for them as well as the visible answer.
+OPENAI_MAX_COMPLETION_TOKENS = int(os.getenv("OPENAI_MAX_COMPLETION_TOKENS", "16384"))
+
+@functools.lru_cache(maxsize=1)
+def get_openai_client():
+    """
+    Return the shared OpenAI client so its HTTP connections to the API are
+    reused across requests. Created on first use, since the constructor
+    fails when no API key is configured.
+    """
+    from openai import OpenAI
+
+    return OpenAI(api_key=OPENAI_API_KEY, timeout=OPENAI_TIMEOUT_SECONDS)
+
+# Pricing (USD per token) for different models as (input, output) rates.
+# Published prices are per million tokens, e.g. 5e-8 == $0.05 / 1M tokens.
 # See OpenAI pricing docs for up-to-date values.
 PRICES = {
-    "gpt-5-nano": {"in": 0.05 / 1_000_000, "out": 0.40 / 1_000_000},
-    "gpt-5-mini": {"in": 0.25 / 1_000_000, "out": 2.00 / 1_000_000},
-    "gpt-3.5-turbo": {"in": 0.50 / 1_000_000, "out": 1.50 / 1_000_000},
+    "gpt-5-nano": (5e-8, 4e-7),
+    "gpt-5-mini": (2.5e-7, 2e-6),
+    "gpt-3.5-turbo": (5e-7, 1.5e-6),
 }
 
-def calculate_openai_cost(tokens_in: int, tokens_out: int, model_name: str) -> float:
+def make_cost_calculator(model_name: str):
     """
-    Compute the cost in USD for a given number of input and output tokens
-    based on the model's pricing. Defaults to zero if model is unknown.
+    Return a function computing the cost in USD for a given number of input
+    and output tokens, with the model's rates bound in. Unknown models cost zero.
     """
-    rates = PRICES.get(model_name)
-    if not rates:
-        return 0.0
-    return tokens_in * rates["in"] + tokens_out * rates["out"]
+    rate_in, rate_out = PRICES.get(model_name, (0.0, 0.0))
+
+    def calculate_cost(tokens_in: int, tokens_out: int) -> float:
+        return tokens_in * rate_in + tokens_out * rate_out
+
+    return calculate_cost
+
+# OPENAI_MODEL is fixed at startup, so its rates are looked up once here.
+calculate_openai_cost = make_cost_calculator(OPENAI_MODEL)
 
+# Connection pool size bounds. The pool is created on first use so the service
+# can still start without a reachable database. The minimum defaults to the
+# maximum because the pool closes returned connections beyond its minimum,
+# losing their prepared statements.
+DB_POOL_MAX_CONN = int(os.getenv("DB_POOL_MAX_CONN", "20"))
+DB_POOL_MIN_CONN = min(int(os.getenv("DB_POOL_MIN_CONN", str(DB_POOL_MAX_CONN))), DB_POOL_MAX_CONN)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Statements used on every request are prepared once per pooled connection so
+# Postgres can skip parsing and planning them on each execution. They are sent
+# together in one round trip.
+PREPARED_STATEMENTS = ";".join((
+    """
+    PREPARE ai_usage_reserve (text, bigint, bigint, float8, float8) AS
+    INSERT INTO ai_usage (user_id, token_count, monthly_cost, reset_date_epoch)
+    SELECT $1, 0, $4, $3 WHERE $4 <= $5
+    ON CONFLICT (user_id) DO UPDATE SET
+        token_count = CASE WHEN ai_usage.reset_date_epoch <= $2 THEN 0 ELSE ai_usage.token_count END,
+        monthly_cost = CASE WHEN ai_usage.reset_date_epoch <= $2 THEN 0 ELSE ai_usage.monthly_cost END + $4,
+        reset_date_epoch = CASE WHEN ai_usage.reset_date_epoch <= $2 THEN $3 ELSE ai_usage.reset_date_epoch END
+    WHERE CASE WHEN ai_usage.reset_date_epoch <= $2 THEN 0 ELSE ai_usage.monthly_cost END + $4 <= $5
+    RETURNING token_count, monthly_cost, reset_date_epoch
+    """,
+    """
+    PREPARE ai_usage_update (text, integer, float8) AS
+    UPDATE ai_usage SET token_count = token_count + $2, monthly_cost = monthly_cost + $3
+    WHERE user_id = $1
+    RETURNING token_count, monthly_cost
+    """,
+))
+_prepared_conns = weakref.WeakSet()
+
+def get_db_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                from psycopg2.pool import ThreadedConnectionPool
+
+                _pool = ThreadedConnectionPool(DB_POOL_MIN_CONN, DB_POOL_MAX_CONN, DATABASE_URL, sslmode='require')
+    return _pool
+
+@contextmanager
 def get_db_conn():
-    return psycopg2.connect(DATABASE_URL, sslmode='require')
+    """
+    Borrow a connection from the pool and hand it back when done. Pooled
+    connections run in autocommit mode: every query here is a single atomic
+    statement, so a separate COMMIT would only cost another round trip.
+    """
+    pool = get_db_pool()
+    conn = pool.getconn()
+    try:
+        if conn not in _prepared_conns:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(PREPARED_STATEMENTS)
+            _prepared_conns.add(conn)
+        yield conn
+    finally:
+        pool.putconn(conn)
+
+def estimate_max_cost(messages):
+    """
+    Upper bound on what one completion for these messages can cost. Every token
+    covers at least one byte of UTF-8 text, so the prompt length in bytes (plus
+    a small per-message overhead) bounds the input tokens.
+    """
+    max_tokens_in = sum(len(m["content"].encode("utf-8")) + 8 for m in messages)
+    return calculate_openai_cost(max_tokens_in, OPENAI_MAX_COMPLETION_TOKENS)
 
-def init_user_usage(user_id):
-    now = datetime.utcnow()
-    reset_date = now + timedelta(days=30)
+def reserve_usage(user_id, amount):
+    """
+    Create the usage row for a user if needed, reset it when the billing
+    period has passed, and add amount to the monthly cost, all in a single
+    statement. Returns the usage including the reservation, or None, reserving
+    nothing, when it would take the user over MONTHLY_LIMIT_USD. Concurrent
+    requests serialize on the row, so together they can never reserve more
+    than the limit.
+    """
+    now = int(time.time())
+    new_reset = now + USAGE_PERIOD_SECONDS
     with get_db_conn() as conn:
         with conn.cursor() as cur:
             cur.execute(
-                "INSERT INTO ai_usage (user_id, token_count, monthly_cost, reset_date) VALUES (%s, %s, %s, %s) ON CONFLICT (user_id) DO NOTHING",
-                (user_id, 0, 0.0, reset_date)
+                "EXECUTE ai_usage_reserve (%s, %s, %s, %s, %s)",
+                (user_id, now, new_reset, amount, MONTHLY_LIMIT_USD),
             )
-            conn.commit()
-
-def get_usage(user_id):
-    with get_db_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT token_count, monthly_cost, reset_date FROM ai_usage WHERE user_id = %s", (user_id,))
             result = cur.fetchone()
-            if result:
-                return {"token_count": result[0], "monthly_cost": float(result[1]), "reset_date": result[2]}
-    return None
+    if result is None:
+        return None
+    return {"token_count": result[0], "monthly_cost": float(result[1]), "reset_date_epoch": result[2]}
 
 def update_usage(user_id, tokens, cost):
+    """
+    Add tokens and a cost adjustment (negative when settling a reservation
+    for less than was reserved) to the user's usage, and return the new
+    (token_count, monthly_cost) totals from the same atomic statement.
+    """
     with get_db_conn() as conn:
         with conn.cursor() as cur:
-            cur.execute(
-                "UPDATE ai_usage SET token_count = token_count + %s, monthly_cost = monthly_cost + %s WHERE user_id = %s",
-                (tokens, cost, user_id)
-            )
-            conn.commit()
+            cur.execute("EXECUTE ai_usage_update (%s, %s, %s)", (user_id, tokens, cost))
+            result = cur.fetchone()
+    return result[0], float(result[1])
 
-def reset_if_needed(user_id, usage):
-    now = datetime.utcnow()
-    if now >= usage['reset_date']:
-        with get_db_conn() as conn:
-            with conn.cursor() as cur:
-                new_reset = now + timedelta(days=30)
-                cur.execute(
-                    "UPDATE ai_usage SET token_count = 0, monthly_cost = 0, reset_date = %s WHERE user_id = %s",
-                    (new_reset, user_id)
-                )
-                conn.commit()
-            usage["token_count"] = 0
-            usage["monthly_cost"] = 0.0
-            usage["reset_date"] = new_reset
-    return usage
+LIMIT_REACHED_ERROR = "Monthly AI usage limit reached. Try again next month."
+STRATEGY_FAILED_ERROR = "AI strategy generation failed. Please try again."
+
+def usage_summary(usage):
+    return {
+        "tokens_used": usage["token_count"],
+        "cost_so_far": round(usage["monthly_cost"], 4),
+        "reset_on": datetime.fromtimestamp(usage["reset_date_epoch"], timezone.utc).strftime("%Y-%m-%d"),
+    }
+
+def sse_event(payload, event=None):
+    """Format one Server-Sent Events message with a JSON payload."""
+    data = app.json.dumps(payload)
+    if event:
+        return f"event: {event}\ndata: {data}\n\n"
+    return f"data: {data}\n\n"
+
+def stream_strategy(user_id, messages, prediction, confidence, usage, reserved):
+    """
+    Relay the OpenAI completion to the client as it is generated, then send a
+    final "done" event with the ML prediction and updated usage, or an "error"
+    event if the OpenAI call fails or runs out of completion tokens before
+    producing any text. The reserved budget is settled when the
+    stream ends, including when the client disconnects. If the actual usage
+    never arrived but output did, the full reservation is kept, since the call
+    was billed.
+    """
+    tokens_in = tokens_out = 0
+    usage_known = started = has_content = failed = False
+    finish_reason = None
+    try:
+        try:
+            with get_openai_client().chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=messages,
+                max_completion_tokens=OPENAI_MAX_COMPLETION_TOKENS,
+                stream=True,
+                stream_options={"include_usage": True},
+            ) as chunks:
+                for chunk in chunks:
+                    started = True
+                    if chunk.usage:
+                        tokens_in = chunk.usage.prompt_tokens or 0
+                        tokens_out = chunk.usage.completion_tokens or 0
+                        usage_known = True
+                    if chunk.choices:
+                        finish_reason = chunk.choices[0].finish_reason or finish_reason
+                        if chunk.choices[0].delta.content:
+                            has_content = True
+                            yield sse_event({"ai_strategy": chunk.choices[0].delta.content})
+            if finish_reason == "length" and not has_content:
+                app.logger.warning("OpenAI strategy stream hit the completion token cap before any output")
+                failed = True
+                yield sse_event({"error": STRATEGY_FAILED_ERROR}, event="error")
+        except Exception:
+            app.logger.exception("OpenAI strategy stream failed")
+            failed = True
+            yield sse_event({"error": STRATEGY_FAILED_ERROR}, event="error")
+    finally:
+        if usage_known:
+            cost = calculate_openai_cost(tokens_in, tokens_out)
+        else:
+            cost = reserved if started else 0.0
+        usage["token_count"], usage["monthly_cost"] = update_usage(user_id, tokens_in + tokens_out, cost - reserved)
+
+    if failed:
+        return
+    yield sse_event({
+        "ml_prediction": prediction,
+        "confidence": round(float(confidence), 2),
+        "usage": usage_summary(usage),
+    }, event="done")
+
+class StrategyRequest(BaseModel):
+    """Request body for /strategy-suggestion."""
+
+    user_id: str = "default_user"
+    symbol: str = "BTCUSDT"
+    currentStrategy: str = ""
+    btc_change: float = 0.0
+    eth_change: float = 0.0
+    stream: bool = False
 
 @app.route("/strategy-suggestion", methods=["POST"])
 def strategy_suggestion():
-    data = request.get_json()
-    user_id = data.get("user_id", "default_user")
-    symbol = data.get("symbol", "BTCUSDT")
-    current = data.get("currentStrategy", "")
-    btc_change = float(data.get("btc_change", 0))
-    eth_change = float(data.get("eth_change", 0))
-
-    # Initialize or load usage data for the user.
-    init_user_usage(user_id)
-    usage = get_usage(user_id)
-    usage = reset_if_needed(user_id, usage)
-
-    # Check monthly cost limit before making any API call.
-    if usage["monthly_cost"] >= MONTHLY_LIMIT_USD:
-        return jsonify({"error": "Monthly AI usage limit reached. Try again next month."}), 403
+    try:
+        req = StrategyRequest.model_validate(request.get_json())
+    except ValidationError as exc:
+        return jsonify({
+            "error": "Invalid request body",
+            "details": exc.errors(include_url=False, include_context=False),
+        }), 422
+    user_id = req.user_id
+    symbol = req.symbol
+    current = req.currentStrategy
+    btc_change = req.btc_change
+    eth_change = req.eth_change
+    stream = req.stream
+
+    # Cap how fast a single user can trigger OpenAI calls.
+    if not allow_request(user_id):
+        return jsonify({"error": "Too many AI requests. Please slow down."}), 429
+
+    # Machine learning prediction using our local model. Done before any usage
+    # is touched or OpenAI is called, so a failed prediction costs nothing.
+    x = np.asarray([btc_change, eth_change], dtype=np.float32)
+    try:
+        prediction, confidence = predict(x)
+    except FutureTimeoutError:
+        return jsonify({"error": "Strategy model is busy. Please try again shortly."}), 503
 
     # Compose the prompt for the AI model.
     gpt_prompt = (
@@ -112,55 +421,74 @@ def strategy_suggestion():
         f"BTC change: {btc_change}%, ETH change: {eth_change}%. "
         f"Current strategy: {current}"
     )
+    messages = [
+        {"role": "system", "content": "You are a crypto trading expert."},
+        {"role": "user", "content": gpt_prompt},
+    ]
 
-    # Create an OpenAI client. We explicitly use the OpenAI SDK to obtain token usage info.
-    from openai import OpenAI  # imported here to avoid circular import issues
-    client = OpenAI(api_key=openai.api_key)
-
-    # Call the OpenAI chat completion API with the selected model.
-    response = client.chat.completions.create(
-        model=OPENAI_MODEL,
-        messages=[
-            {"role": "system", "content": "You are a crypto trading expert."},
-            {"role": "user", "content": gpt_prompt},
-        ],
-    )
+    # Initialize, reset if the period has passed, and reserve the most this call
+    # can cost before making it. Without a successful reservation OpenAI is not
+    # called, so concurrent requests cannot overshoot the monthly limit. The
+    # reservation is settled to the actual cost afterwards.
+    reserved = estimate_max_cost(messages)
+    usage = reserve_usage(user_id, reserved)
+    if usage is None:
+        return jsonify({"error": LIMIT_REACHED_ERROR}), 403
 
-    ai_strategy = response.choices[0].message.content
+    # With "stream": true the strategy text is sent as Server-Sent Events while
+    # it is generated, instead of after the whole completion has arrived.
+    if stream:
+        return app.response_class(
+            stream_strategy(user_id, messages, prediction, confidence, usage, reserved),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
 
-    # Machine learning prediction using our local model.
-    X = [[btc_change, eth_change]]
-    prediction = model.predict(X)[0]
-    confidence = max(model.predict_proba(X)[0])
+    # Call the OpenAI chat completion API with the selected model. We explicitly
+    # use the OpenAI SDK to obtain token usage info.
+    try:
+        response = get_openai_client().chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=messages,
+            max_completion_tokens=OPENAI_MAX_COMPLETION_TOKENS,
+        )
+    except Exception:
+        # Failed calls are not billed, so hand the reservation back.
+        update_usage(user_id, 0, -reserved)
+        raise
+    choice = response.choices[0]
+    ai_strategy = choice.message.content
 
     # Calculate actual token usage and cost.
     usage_obj = getattr(response, "usage", None) or {}
     tokens_in = getattr(usage_obj, "prompt_tokens", None) or 0
     tokens_out = getattr(usage_obj, "completion_tokens", None) or 0
     total_tokens = tokens_in + tokens_out
-    cost = calculate_openai_cost(tokens_in, tokens_out, OPENAI_MODEL)
+    cost = calculate_openai_cost(tokens_in, tokens_out)
 
-    # Update usage in the database.
-    update_usage(user_id, total_tokens, cost)
+    # Settle the reservation to the actual cost and record the tokens used.
+    usage["token_count"], usage["monthly_cost"] = update_usage(user_id, total_tokens, cost - reserved)
 
-    # Update local usage dictionary for return.
-    usage["token_count"] += total_tokens
-    usage["monthly_cost"] += cost
+    # A reasoning model can spend the whole token cap on reasoning and return
+    # no text. The call is still billed, but there is no strategy to return.
+    if not ai_strategy and choice.finish_reason == "length":
+        app.logger.warning("OpenAI strategy hit the completion token cap before any output")
+        return jsonify({"error": STRATEGY_FAILED_ERROR}), 502
 
     return jsonify({
         "ai_strategy": ai_strategy,
         "ml_prediction": prediction,
         "confidence": round(float(confidence), 2),
-        "usage": {
-            "tokens_used": usage["token_count"],
-            "cost_so_far": round(usage["monthly_cost"], 4),
-            "reset_on": usage["reset_date"].strftime("%Y-%m-%d"),
-        },
+        "usage": usage_summary(usage),
     })
 
+# Health checks are polled constantly, so the body is serialized once up front.
+HEALTH_OK_BODY = b'{"status":"ok"}'
+
 @app.route("/health", methods=["GET"])
 def health():
-    return jsonify({"status": "ok"})
+    # A fresh response per request, since flask-cors adds headers to it.
+    return app.response_class(HEALTH_OK_BODY, mimetype="application/json")
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5001)
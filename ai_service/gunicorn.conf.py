@@ -0,0 +1,63 @@
+import importlib
+import math
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5001')}"
+
+def available_cpus():
+    """
+    CPUs this container may actually use: the scheduler affinity mask, further
+    limited by a cgroup v2 CPU quota when one is set. multiprocessing.cpu_count()
+    reports host cores and would oversize the worker count. Platforms without
+    sched_getaffinity, such as macOS, fall back to os.cpu_count().
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+# Threaded workers: most request time is spent waiting on OpenAI and Postgres.
+# Each worker holds its own ONNX session and database pool, so keep the count
+# modest; set WEB_CONCURRENCY to override.
+workers = int(os.getenv("WEB_CONCURRENCY", available_cpus() * 2 + 1))
+worker_class = "gthread"
+# A request mostly waits on the OpenAI completion, which can take tens of
+# seconds, so each worker runs many of them at once. Capacity is
+# workers * threads concurrent requests.
+threads = int(os.getenv("GUNICORN_THREADS", "32"))
+keepalive = 5
+
+# A worker never runs more than `threads` requests at once, so a larger
+# database pool per worker would only hold idle Postgres connections. The pool
+# keeps all of them open: it closes returned connections beyond its minimum,
+# which would throw away their prepared statements. Set here because the app
+# reads these when it is preloaded in the master.
+os.environ.setdefault("DB_POOL_MAX_CONN", str(threads))
+os.environ.setdefault("DB_POOL_MIN_CONN", os.environ["DB_POOL_MAX_CONN"])
+
+# Import the app once in the master so workers share its code pages.
+preload_app = True
+
+# The app imports the OpenAI SDK and the Postgres pool lazily, on first use.
+# Importing them here, in the master before any worker is forked, means
+# workers inherit them instead of the first request in each paying for it.
+PRELOAD_MODULES = ("openai", "psycopg2.pool")
+
+def when_ready(server):
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
+
+def post_worker_init(worker):
+    # The ONNX session is loaded per worker rather than in the master, since
+    # onnxruntime sessions are not safe to carry across fork().
+    from app import get_model
+
+    get_model()
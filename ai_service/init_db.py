@@ -11,10 +11,52 @@ CREATE TABLE IF NOT EXISTS ai_usage (
     user_id TEXT PRIMARY KEY,
     token_count INTEGER NOT NULL DEFAULT 0,
     monthly_cost FLOAT NOT NULL DEFAULT 0.0,
-    reset_date TIMESTAMP NOT NULL
+    reset_date_epoch BIGINT NOT NULL
 )
 """)
 
+# Migrate tables created with the old TIMESTAMP reset_date column to epoch seconds.
+# The previous release still reads and writes reset_date while a deploy rolls
+# out, so the column is kept and a trigger keeps both in step: rows written by
+# either version get the other column filled in. Drop reset_date, the trigger
+# and its function in a later release, once no old instances remain.
+cur.execute("ALTER TABLE ai_usage ADD COLUMN IF NOT EXISTS reset_date_epoch BIGINT")
+cur.execute("""
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'ai_usage' AND column_name = 'reset_date'
+    ) THEN
+        CREATE OR REPLACE FUNCTION ai_usage_sync_reset_date() RETURNS trigger AS $fn$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                IF NEW.reset_date_epoch IS NULL THEN
+                    NEW.reset_date_epoch := EXTRACT(EPOCH FROM NEW.reset_date)::BIGINT;
+                ELSIF NEW.reset_date IS NULL THEN
+                    NEW.reset_date := to_timestamp(NEW.reset_date_epoch) AT TIME ZONE 'UTC';
+                END IF;
+            ELSIF NEW.reset_date IS DISTINCT FROM OLD.reset_date THEN
+                NEW.reset_date_epoch := EXTRACT(EPOCH FROM NEW.reset_date)::BIGINT;
+            ELSIF NEW.reset_date_epoch IS DISTINCT FROM OLD.reset_date_epoch THEN
+                NEW.reset_date := to_timestamp(NEW.reset_date_epoch) AT TIME ZONE 'UTC';
+            END IF;
+            RETURN NEW;
+        END
+        $fn$ LANGUAGE plpgsql;
+
+        DROP TRIGGER IF EXISTS ai_usage_sync_reset_date ON ai_usage;
+        CREATE TRIGGER ai_usage_sync_reset_date
+            BEFORE INSERT OR UPDATE ON ai_usage
+            FOR EACH ROW EXECUTE FUNCTION ai_usage_sync_reset_date();
+
+        UPDATE ai_usage SET reset_date_epoch = EXTRACT(EPOCH FROM reset_date)::BIGINT
+        WHERE reset_date_epoch IS NULL;
+    END IF;
+END $$
+""")
+cur.execute("ALTER TABLE ai_usage ALTER COLUMN reset_date_epoch SET NOT NULL")
+
 conn.commit()
 cur.close()
 conn.close()
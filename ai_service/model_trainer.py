@@ -1,15 +1,61 @@
+import hashlib
+import os
+import sys
+import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
-import joblib
+from skl2onnx import convert_sklearn
+from skl2onnx.common.data_types import FloatTensorType
 
-df = pd.read_csv("market_data.csv")
-X = df[["btc_change", "eth_change"]]
-y = df["label"]
+DATA_FILE = "market_data.csv"
+ONNX_MODEL_FILE = "ml_strategy_model.onnx"
+HASH_FILE = "ml_strategy_model.sha256"
 
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2)
+def file_sha256(*paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
 
-model = RandomForestClassifier()
+# Retrain only when the training data or this script has changed, or the model
+# file differs from the one written by the last training run. HASH_FILE holds
+# the input hash and the model hash on separate lines.
+input_hash = file_sha256(DATA_FILE, __file__)
+
+if os.path.exists(ONNX_MODEL_FILE) and os.path.exists(HASH_FILE):
+    with open(HASH_FILE) as f:
+        saved = f.read().split()
+    if saved == [input_hash, file_sha256(ONNX_MODEL_FILE)]:
+        print("Training data and model unchanged, keeping existing model.")
+        sys.exit(0)
+
+df = pd.read_csv(DATA_FILE)
+X = df[["btc_change", "eth_change"]].to_numpy(dtype=np.float32)
+y = df["label"].to_numpy()
+
+X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=0)
+
+# Bounded depth keeps inference cheap; n_jobs=-1 fits the trees on all cores.
+model = RandomForestClassifier(
+    n_estimators=100,
+    max_depth=12,
+    max_features="sqrt",
+    n_jobs=-1,
+    random_state=0,
+)
 model.fit(X_train, y_train)
 
-joblib.dump(model, "ml_strategy_model.pkl")
\ No newline at end of file
+# Export to ONNX for serving. zipmap is disabled so probabilities come back as
+# a plain float tensor rather than a list of per-class dicts.
+onnx_model = convert_sklearn(
+    model,
+    initial_types=[("input", FloatTensorType([None, 2]))],
+    options={id(model): {"zipmap": False}},
+)
+with open(ONNX_MODEL_FILE, "wb") as f:
+    f.write(onnx_model.SerializeToString())
+
+with open(HASH_FILE, "w") as f:
+    f.write(f"{input_hash}\n{file_sha256(ONNX_MODEL_FILE)}\n")
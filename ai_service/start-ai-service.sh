@@ -43,4 +43,4 @@ fi
 
 # Start the AI service
 echo "Starting AI service on port 5001..."
-python app.py
\ No newline at end of file
+gunicorn app:app
\ No newline at end of file
@@ -1,8 +1,24 @@
 from flask import Flask, request, jsonify
+from flask.json.provider import JSONProvider
+import orjson
 import os
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+class ORJSONProvider(JSONProvider):
+    """Encode and decode JSON with orjson, which is much faster than the stdlib json module."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 
 HUAWEI_APP_ID = os.getenv("HUAWEI_APP_ID")
 HUAWEI_APP_SECRET = os.getenv("HUAWEI_APP_SECRET")
@@ -11,14 +27,62 @@ HUAWEI_APP_SECRET = os.getenv("HUAWEI_APP_SECRET")
 TOKEN_ENDPOINT = "https://oauth-login.cloud.huawei.com/oauth2/v3/token"
 SUBSCRIPTION_VERIFY_ENDPOINT = "https://subscr-drcn.iap.hicloud.com/sub/applications/v2/purchases/get"
 
+# (connect, read) timeouts in seconds for calls to Huawei.
+HUAWEI_TIMEOUT = (2, 5)
+
+# Shared session so the TLS connections to Huawei are kept alive and reused.
+# Both Huawei calls are POSTs that are safe to repeat (a token grant and a
+# read-only purchase lookup), so they are allowed to retry on gateway errors.
+session = requests.Session()
+adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=2,
+        backoff_factor=0.1,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=frozenset({"POST"}),
+    ),
+)
+session.mount("https://", adapter)
+
+# Access tokens are valid for about an hour, so keep the current one in memory
+# and only go back to Huawei once it is close to expiring.
+TOKEN_REFRESH_MARGIN_SECONDS = 60
+_token_cache = {"value": None, "exp": 0.0}
+_token_lock = threading.Lock()
+
 def get_access_token():
-    data = {
-        "grant_type": "client_credentials",
-        "client_id": HUAWEI_APP_ID,
-        "client_secret": HUAWEI_APP_SECRET
-    }
-    resp = requests.post(TOKEN_ENDPOINT, data=data)
-    return resp.json().get("access_token")
+    now = time.monotonic()
+    if _token_cache["value"] and _token_cache["exp"] - now > TOKEN_REFRESH_MARGIN_SECONDS:
+        return _token_cache["value"]
+
+    with _token_lock:
+        # Another thread may have refreshed the token while we were waiting.
+        now = time.monotonic()
+        if _token_cache["value"] and _token_cache["exp"] - now > TOKEN_REFRESH_MARGIN_SECONDS:
+            return _token_cache["value"]
+
+        data = {
+            "grant_type": "client_credentials",
+            "client_id": HUAWEI_APP_ID,
+            "client_secret": HUAWEI_APP_SECRET
+        }
+        resp = session.post(TOKEN_ENDPOINT, data=data, timeout=HUAWEI_TIMEOUT)
+        token_data = resp.json()
+        access_token = token_data.get("access_token")
+        if access_token:
+            expires_in = float(token_data.get("expires_in", 3600))
+            _token_cache["value"] = access_token
+            _token_cache["exp"] = now + expires_in
+        return access_token
+
+def invalidate_access_token(access_token):
+    """Drop a token Huawei has rejected, unless another thread already replaced it."""
+    with _token_lock:
+        if _token_cache["value"] == access_token:
+            _token_cache["value"] = None
+            _token_cache["exp"] = 0.0
 
 @app.route("/verify-huawei-subscription", methods=["POST"])
 def verify_huawei_subscription():
@@ -34,14 +98,20 @@ def verify_huawei_subscription():
     if not access_token:
         return jsonify({"error": "Failed to obtain Huawei access token"}), 500
 
-    headers = {"Authorization": f"Bearer {access_token}"}
     payload = {
         "purchaseToken": purchase_token,
         "productId": product_id,
         "packageName": HUAWEI_APP_ID
     }
 
-    r = requests.post(SUBSCRIPTION_VERIFY_ENDPOINT, json=payload, headers=headers)
+    r = session.post(SUBSCRIPTION_VERIFY_ENDPOINT, json=payload, headers={"Authorization": f"Bearer {access_token}"}, timeout=HUAWEI_TIMEOUT)
+    if r.status_code == 401:
+        # The cached token was revoked or expired early; fetch a new one and retry once.
+        invalidate_access_token(access_token)
+        access_token = get_access_token()
+        if not access_token:
+            return jsonify({"error": "Failed to obtain Huawei access token"}), 500
+        r = session.post(SUBSCRIPTION_VERIFY_ENDPOINT, json=payload, headers={"Authorization": f"Bearer {access_token}"}, timeout=HUAWEI_TIMEOUT)
     data = r.json()
 
     # Check if subscription is valid
@@ -55,9 +125,11 @@ def verify_huawei_subscription():
     else:
         return jsonify({"status": "inactive", "reason": data}), 403
 
+HEALTH_OK_BODY = b'{"status":"ok"}'
+
 @app.route("/health")
 def health():
-    return jsonify({"status": "ok"})
+    return app.response_class(HEALTH_OK_BODY, mimetype="application/json")
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5002)
\ No newline at end of file
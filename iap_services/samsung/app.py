@@ -26,9 +26,11 @@ def verify_samsung_subscription():
         "expiryTime": fake_expiry.isoformat() + "Z"
     })
 
+HEALTH_OK_BODY = b'{"status":"ok"}'
+
 @app.route("/health")
 def health():
-    return jsonify({ "status": "ok" })
+    return app.response_class(HEALTH_OK_BODY, mimetype="application/json")
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5003)
\ No newline at end of file